@@ -1,7 +1,10 @@
 from abc import abstractmethod, ABCMeta
 import os
 import json
+import functools
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import click
 from mlflow_export_import.common import MlflowExportImportException
 from . import USER_AGENT
@@ -96,11 +99,12 @@ class HttpClient(BaseHttpClient):
         self.host = host
         self.api_uri = os.path.join(host, api_name)
         self.token = token
+        self._session = _mk_session()
 
 
     def _get(self, resource, params=None):
         uri = self._mk_uri(resource)
-        rsp = requests.get(uri, headers=self._mk_headers(), json=params, timeout=_TIMEOUT)
+        rsp = self._session.get(uri, headers=self._mk_headers(), json=params, timeout=_TIMEOUT)
         return self._check_response(rsp, params)
 
     def get(self, resource, params=None):
@@ -112,7 +116,7 @@ class HttpClient(BaseHttpClient):
 
 
     def _post(self, resource, data=None):
-        return self._mutator(requests.post, resource, data)
+        return self._mutator(self._session.post, resource, data)
 
     def post(self, resource, data=None):
         """ Executes an HTTP POST call
@@ -123,7 +127,7 @@ class HttpClient(BaseHttpClient):
 
 
     def _put(self, resource, data=None):
-        return self._mutator(requests.put, resource, data)
+        return self._mutator(self._session.put, resource, data)
 
     def put(self, resource, data=None):
         """ Executes an HTTP PUT call
@@ -134,7 +138,7 @@ class HttpClient(BaseHttpClient):
 
 
     def _patch(self, resource, data=None):
-        return self._mutator(requests.patch, resource, data)
+        return self._mutator(self._session.patch, resource, data)
 
     def patch(self, resource, data=None):
         """ Executes an HTTP PATCH call
@@ -146,7 +150,7 @@ class HttpClient(BaseHttpClient):
 
     def _delete(self, resource):
         uri = self._mk_uri(resource)
-        rsp = requests.delete(uri, headers=self._mk_headers(), timeout=_TIMEOUT)
+        rsp = self._session.delete(uri, headers=self._mk_headers(), timeout=_TIMEOUT)
         return self._check_response(rsp)
 
     def delete(self, resource):
@@ -280,6 +284,28 @@ class UnityCatalogHttpClient(BaseHttpClient):
         return str(msg)
 
 
+def _mk_session():
+    """
+    Create a session whose connection pool is reused by all calls of a client.
+    Throttled (429) and transient server error responses are retried with exponential backoff.
+    The last response is returned rather than raised so that _check_response reports it.
+    """
+    retry = Retry(total=5, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@functools.lru_cache(maxsize=8)
+def _get_client(client_class, *args):
+    """
+    Share one client (and therefore its connection pool) per client class, host and token.
+    """
+    return client_class(*args)
+
+
 def get_mlflow_client():
     """
     Returns either a UC-enabled client or not, depending if MLFLOW_REGISTRY_URI is set to 'databricks-uc://e2_demo'
@@ -295,9 +321,9 @@ def create_http_client(mlflow_client, model_name=None):
     from mlflow_export_import.common import model_utils
     creds = mlflow_client._tracking_client.store.get_host_creds()
     if model_name and model_utils.is_unity_catalog_model(model_name):
-        return HttpClient("api/2.0/mlflow/unity-catalog", creds.host, creds.token)
+        return _get_client(HttpClient, "api/2.0/mlflow/unity-catalog", creds.host, creds.token)
     else:
-        return MlflowHttpClient(creds.host, creds.token)
+        return _get_client(MlflowHttpClient, creds.host, creds.token)
 
 
 def create_dbx_client(mlflow_client):
@@ -305,7 +331,7 @@ def create_dbx_client(mlflow_client):
     Create Databricks HTTP client from MlflowClient.
     """
     creds = mlflow_client._tracking_client.store.get_host_creds()
-    return DatabricksHttpClient(creds.host, creds.token)
+    return _get_client(DatabricksHttpClient, creds.host, creds.token)
 
 
 def is_unity_catalog():
@@ -44,17 +44,33 @@ def _mk_system_attr(script):
     return { ExportFields.SYSTEM: dct }
 
 
+def mk_export_dict(script, mlflow_attr, info_attr=None):
+    """
+    Create standard formatted export dict with 'system', 'info' and 'mlflow' stanzas.
+    """
+    info_attr = { ExportFields.INFO: info_attr} if info_attr else {}
+    mlflow_attr = { ExportFields.MLFLOW: mlflow_attr}
+    return { **_mk_system_attr(script), **info_attr, **mlflow_attr }
+
+
 def write_export_file(dir, file, script, mlflow_attr, info_attr=None):
     """
     Write standard formatted JSON file.
     """
     dir = _filesystem.mk_local_path(dir)
     path = os.path.join(dir, file)
-    info_attr = { ExportFields.INFO: info_attr} if info_attr else {}
-    mlflow_attr = { ExportFields.MLFLOW: mlflow_attr}
-    mlflow_attr = { **_mk_system_attr(script), **info_attr, **mlflow_attr }
     os.makedirs(dir, exist_ok=True)
-    write_file(path, mlflow_attr)
+    write_file(path, mk_export_dict(script, mlflow_attr, info_attr))
+
+
+def write_export_bytes(dir, file, content):
+    """
+    Write an already serialized export file.
+    """
+    dir = _filesystem.mk_local_path(dir)
+    os.makedirs(dir, exist_ok=True)
+    with open(os.path.join(dir, file), "wb") as f:
+        f.write(content)
 
 
 def _is_yaml(path, file_type=None):
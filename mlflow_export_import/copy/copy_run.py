@@ -1,10 +1,19 @@
+import os
+import errno
+import shutil
 import click
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import mlflow
+from mlflow.entities import RunStatus
+from mlflow.entities.lifecycle_stage import LifecycleStage
+from mlflow.utils.file_utils import local_file_uri_to_path
 
-from mlflow_export_import.run.export_run import export_run
+from mlflow_export_import.run.export_run import export_run, mk_run_attr
 from mlflow_export_import.run.import_run import import_run
-from mlflow_export_import.common import utils
+from mlflow_export_import.run import run_data_importer, run_utils
+from mlflow_export_import.common import utils, io_utils
 from mlflow_export_import.common.click_options import opt_run_id, opt_experiment_name
 from . import copy_utils
 from . click_options import opt_src_mlflow_uri, opt_dst_mlflow_uri
@@ -38,19 +47,191 @@ def copy(
 def _copy(src_run_id, dst_experiment_name, src_client=None, dst_client=None):
     src_client = src_client or mlflow.MlflowClient()
     dst_client = dst_client or mlflow.MlflowClient()
-    with tempfile.TemporaryDirectory() as download_dir:
+    src_run = src_client.get_run(src_run_id)
+    if _is_local_uri(src_run.info.artifact_uri) and _is_same_local_filesystem(src_client, dst_client):
+        exp_id = copy_utils.create_experiment(dst_client, dst_experiment_name)
+        if _is_local_uri(dst_client.get_experiment(exp_id).artifact_location):
+            return _link_copy(src_run, exp_id, src_client, dst_client)
+    with tempfile.TemporaryDirectory(dir=_get_staging_dir(src_run)) as download_dir:
         export_run(
             src_run_id,
             download_dir,
+            export_deleted_runs = True,
             notebook_formats = [ "SOURCE" ],
-            mlflow_client = src_client
+            mlflow_client = src_client,
+            run = src_run,
+            export_artifacts = False
         )
-        dst_run, _ = import_run(
-            download_dir,
-            dst_experiment_name,
-            mlflow_client = dst_client
+        # Artifacts are staged uncompressed: MLflow downloads and uploads them as plain files,
+        # so compressing the local staging directory would not reduce the bytes sent to either server.
+        artifacts = src_client.list_artifacts(src_run_id)
+        artifacts_dir = os.path.join(download_dir, "pipelined_artifacts")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            downloads = [ (artifact, executor.submit(_download_artifact, src_client, f"{src_run.info.artifact_uri}/{artifact.path}", artifacts_dir))
+                for artifact in artifacts ]
+            dst_run_id = None
+            try:
+                dst_run, _ = import_run(
+                    download_dir,
+                    dst_experiment_name,
+                    mlflow_client = dst_client,
+                    mlmodel_fix = False,
+                    terminate = False
+                )
+                dst_run_id = dst_run.info.run_id
+                for artifact, download in downloads:
+                    _upload_artifact(dst_client, dst_run_id, artifact, download.result())
+                if artifacts:
+                    run_utils.update_mlmodel_run_id(dst_client, dst_run_id)
+                dst_client.set_terminated(dst_run_id, RunStatus.to_string(RunStatus.FINISHED))
+                if src_run.info.lifecycle_stage == LifecycleStage.DELETED:
+                    dst_client.delete_run(dst_run_id)
+            except Exception:
+                for _, download in downloads: # don't wait for pending downloads
+                    download.cancel()
+                if dst_run_id:
+                    dst_client.set_terminated(dst_run_id, RunStatus.to_string(RunStatus.FAILED))
+                raise
+        return dst_client.get_run(dst_run_id)
+
+
+def _download_artifact(client, artifact_uri, dst_dir):
+    """
+    Download by artifact URI rather than run ID and path, which would look up the run for each artifact.
+    """
+    return mlflow.artifacts.download_artifacts(
+        artifact_uri = artifact_uri,
+        dst_path = dst_dir,
+        tracking_uri = client._tracking_client.tracking_uri)
+
+
+def _upload_artifact(client, run_id, artifact, local_path):
+    """
+    Upload a top-level artifact as soon as it has been downloaded, while the next one is still downloading.
+    """
+    if artifact.is_dir:
+        client.log_artifacts(run_id, local_path, artifact.path)
+    else:
+        client.log_artifact(run_id, local_path)
+
+
+def _is_same_local_filesystem(src_client, dst_client):
+    """
+    Are both tracking servers 'file:' backends on the same device?
+    """
+    src_uri = src_client._tracking_client.tracking_uri
+    dst_uri = dst_client._tracking_client.tracking_uri
+    if not src_uri.startswith("file:") or not dst_uri.startswith("file:"):
+        return False
+    src_path = local_file_uri_to_path(src_uri)
+    dst_path = local_file_uri_to_path(dst_uri)
+    while not os.path.exists(dst_path): # destination store may not be created yet
+        dst_path = os.path.dirname(dst_path)
+    return os.stat(src_path).st_dev == os.stat(dst_path).st_dev
+
+
+def _link_copy(src_run, exp_id, src_client, dst_client):
+    """
+    Copy a run between two local file-based tracking servers without exporting and importing its artifacts.
+    The run data is logged with batched calls and the artifact files are hard linked into the destination run.
+    Both the source run and the destination experiment must have local artifact locations.
+    """
+    _logger.info(f"Copying run '{src_run.info.run_id}' by linking its artifacts")
+    dst_run = dst_client.create_run(exp_id)
+    dst_run_id = dst_run.info.run_id
+    try:
+        src_run_dct = mk_run_attr(src_client, src_run)
+        run_data_importer.import_run_data(
+            dst_client,
+            src_run_dct,
+            dst_run_id,
+            False,
+            src_run_dct["info"]["user_id"],
+            False,
+            False
+        )
+        if src_run.inputs.dataset_inputs:
+            dst_client.log_inputs(dst_run_id, src_run.inputs.dataset_inputs)
+        _link_artifacts(
+            local_file_uri_to_path(src_run.info.artifact_uri),
+            local_file_uri_to_path(dst_run.info.artifact_uri),
+            dst_run_id
         )
-        return dst_run
+        dst_client.set_terminated(dst_run_id, RunStatus.to_string(RunStatus.FINISHED))
+        if src_run.info.lifecycle_stage == LifecycleStage.DELETED:
+            dst_client.delete_run(dst_run_id)
+    except Exception:
+        dst_client.set_terminated(dst_run_id, RunStatus.to_string(RunStatus.FAILED))
+        raise
+    return dst_client.get_run(dst_run_id)
+
+
+def _link_artifacts(src_dir, dst_dir, dst_run_id):
+    """
+    Hard link artifact files from src_dir into dst_dir, or symlink them if they are on different devices.
+    MLmodel files are rewritten with the destination run ID instead of being linked so the source is left untouched.
+    """
+    for root, _, files in os.walk(src_dir):
+        dst_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(dst_root, exist_ok=True)
+        for file in files:
+            src_path = os.path.join(root, file)
+            dst_path = os.path.join(dst_root, file)
+            if file == "MLmodel":
+                mlmodel = io_utils.read_file(src_path, "yaml")
+                mlmodel["run_id"] = dst_run_id
+                io_utils.write_file(dst_path, mlmodel, "yaml")
+                continue
+            try:
+                os.link(src_path, dst_path)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                os.symlink(src_path, dst_path)
+
+
+def _get_staging_dir(run):
+    """
+    Directory in which the exported run is staged before being imported.
+    1. MLFLOW_EXPORT_STAGING_DIR if set. It is created if it does not exist.
+    2. Otherwise the RAM-backed '/dev/shm' (if it exists) instead of the default temp disk.
+       MLflow downloads and uploads artifacts from file paths, so a tmpfs directory is used rather than an in-memory file object.
+       Set MLFLOW_COPY_USE_TMPFS to '0' to use the default temp directory.
+    3. '/dev/shm' is only used if it has at least twice the size of the run's artifacts free.
+       The size of non-local artifacts is unknown and is assumed to be MLFLOW_EXPORT_MAX_SHM_BYTES (default 1 GB).
+    :return: Directory or None for the default temp directory.
+    """
+    staging_dir = os.environ.get("MLFLOW_EXPORT_STAGING_DIR")
+    if staging_dir:
+        os.makedirs(staging_dir, exist_ok=True)
+        return staging_dir
+    if os.environ.get("MLFLOW_COPY_USE_TMPFS", "1") == "0" or not os.path.isdir("/dev/shm"):
+        return None
+    size = _get_artifacts_size(run.info.artifact_uri)
+    if size is None:
+        size = int(os.environ.get("MLFLOW_EXPORT_MAX_SHM_BYTES", str(1024**3)))
+    free = shutil.disk_usage("/dev/shm").free
+    if free < 2 * size:
+        _logger.info(f"Not staging run '{run.info.run_id}' in '/dev/shm' since it has {free} bytes free for {size} bytes of artifacts")
+        return None
+    return "/dev/shm"
+
+
+def _get_artifacts_size(artifact_uri):
+    """
+    :return: Total size in bytes of local artifacts or None if the artifacts are not local.
+    """
+    if not _is_local_uri(artifact_uri):
+        return None
+    path = local_file_uri_to_path(artifact_uri)
+    size = 0
+    for root, _, files in os.walk(path):
+        size += sum(os.path.getsize(os.path.join(root, file)) for file in files)
+    return size
+
+
+def _is_local_uri(uri):
+    return urlparse(uri).scheme in ("", "file")
 
 
 @click.command()
@@ -60,7 +241,7 @@ def _copy(src_run_id, dst_experiment_name, src_client=None, dst_client=None):
 @opt_dst_mlflow_uri
 def main(run_id, experiment_name, src_mlflow_uri, dst_mlflow_uri):
     print("Options:")
-    for k,v in locals().items():
+    for k,v in click.get_current_context().params.items():
         print(f"  {k}: {v}")
     copy(run_id, experiment_name, src_mlflow_uri, dst_mlflow_uri)
 
@@ -1,3 +1,4 @@
+import functools
 import mlflow
 from mlflow.exceptions import MlflowException
 
@@ -54,7 +55,16 @@ def adjust_model_version(vr):
 
 
 def mk_client(tracking_uri, registry_uri=None):
-    if not tracking_uri and not registry_uri:
-        return mlflow.MlflowClient()
+    """
+    Clients for an explicit tracking URI are cached so that repeated copies (e.g. from bulk tools) reuse them.
+    Without one the client resolves the current default tracking URI, so it is not cached.
+    """
+    if not tracking_uri:
+        return mlflow.MlflowClient(registry_uri=registry_uri)
     else:
-        return mlflow.MlflowClient(tracking_uri, registry_uri)
+        return _mk_client(tracking_uri, registry_uri)
+
+
+@functools.lru_cache(maxsize=32)
+def _mk_client(tracking_uri, registry_uri):
+    return mlflow.MlflowClient(tracking_uri, registry_uri)
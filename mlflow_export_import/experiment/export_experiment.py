@@ -64,7 +64,7 @@ def export_experiment(
     if run_ids:
         for j,run_id in enumerate(run_ids):
             run = mlflow_client.get_run(run_id)
-            _export_run(mlflow_client, run, output_dir, ok_run_ids, failed_run_ids,
+            _export_run(mlflow_client, dbx_client, run, output_dir, ok_run_ids, failed_run_ids,
                 run_start_time, run_start_time_str, export_deleted_runs, notebook_formats)
             num_runs_exported += 1
     else:
@@ -75,7 +75,7 @@ def export_experiment(
             from mlflow.entities import ViewType
             kwargs["view_type"] = ViewType.ALL
         for j,run in enumerate(SearchRunsIterator(mlflow_client, exp.experiment_id, **kwargs)):
-            _export_run(mlflow_client, run, output_dir, ok_run_ids, failed_run_ids,
+            _export_run(mlflow_client, dbx_client, run, output_dir, ok_run_ids, failed_run_ids,
                 run_start_time, run_start_time_str, export_deleted_runs, notebook_formats)
             num_runs_exported += 1
 
@@ -106,7 +106,7 @@ def export_experiment(
     return len(ok_run_ids), len(failed_run_ids)
 
 
-def _export_run(mlflow_client, run, output_dir, ok_run_ids, failed_run_ids,
+def _export_run(mlflow_client, dbx_client, run, output_dir, ok_run_ids, failed_run_ids,
         run_start_time, run_start_time_str,
         export_deleted_runs, notebook_formats
     ):
@@ -125,7 +125,8 @@ def _export_run(mlflow_client, run, output_dir, ok_run_ids, failed_run_ids,
         output_dir = os.path.join(output_dir, run.info.run_id),
         export_deleted_runs = export_deleted_runs,
         notebook_formats = notebook_formats,
-        mlflow_client = mlflow_client
+        mlflow_client = mlflow_client,
+        dbx_client = dbx_client
     )
     if is_success:
         ok_run_ids.append(run.info.run_id)
@@ -3,11 +3,22 @@ Exports a registered model, its versions and the version's run.
 """
 
 import os
+import json
+import errno
+import shutil
+import tempfile
 import click
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 import mlflow
 from mlflow.exceptions import RestException
+from mlflow.entities.model_registry import model_version_stages
 
 from mlflow_export_import.client.http_client import create_http_client, create_dbx_client
 from mlflow_export_import.common.click_options import (
@@ -23,17 +34,35 @@ from mlflow_export_import.common.click_options import (
 )
 
 from mlflow_export_import.common import utils, io_utils, model_utils
-from mlflow_export_import.common.timestamp_utils import fmt_ts_millis
+from mlflow_export_import.common.timestamp_utils import fmt_ts_millis, TS_FORMAT
 from mlflow_export_import.common import permissions_utils
+from mlflow_export_import.common import filesystem as _filesystem
 from mlflow_export_import.common import MlflowExportImportException
 from mlflow_export_import.run.export_run import export_run
 
 _logger = utils.getLogger(__name__)
 
+_DEFAULT_MAX_WORKERS = 8
+
+_CANONICAL_STAGES = frozenset(stage.lower() for stage in model_version_stages._CANONICAL_MAPPING)
+
+# Key order of the exported registered model: leading keys, then any other keys, then trailing keys.
+# Empty trailing tags and aliases are left out.
+_MODEL_KEY_ORDER = (
+    "name",
+    "creation_timestamp",
+    "_creation_timestamp",
+    "last_updated_timestamp",
+    "_last_updated_timestamp",
+    "user_id",
+    "description"
+)
+_MODEL_TRAILING_KEYS = ("tags", "aliases", "versions")
+
 @dataclass()
 class Options:
-    stages: None
-    versions: None
+    stages: frozenset
+    versions: frozenset
     export_latest_versions: bool
     export_deleted_runs: bool
     export_version_model: bool
@@ -72,10 +101,10 @@ def export_model(
     dbx_client = create_dbx_client(mlflow_client)
 
     stages = _normalize_stages(stages)
-    versions = versions if versions else []
-    if len(stages) > 0 and len(versions) > 0:
+    versions = frozenset(versions) if versions else frozenset()
+    if stages and versions:
         raise MlflowExportImportException(
-            f"Both stages {stages} and versions {versions} cannot be set", http_status_code=400)
+            f"Both stages {list(stages)} and versions {list(versions)} cannot be set", http_status_code=400)
 
     opts = Options(stages, versions, export_latest_versions, export_deleted_runs, export_version_model, export_permissions, notebook_formats)
 
@@ -87,14 +116,10 @@ def export_model(
         if e.json.get("error_code") == "RESOURCE_DOES_NOT_EXIST":
             _logger.error({ **{"message": "Model does not exist"}, **err_msg})
         else:
-            _logger.error({**{"message": "Model cannot be exported"}, **err_msg})
-            import traceback
-            traceback.print_exc()
+            _logger.exception({**{"message": "Model cannot be exported"}, **err_msg})
         return False, model_name
     except Exception as e:
-        _logger.error({ "model": model_name, "Exception": e })
-        import traceback
-        traceback.print_exc()
+        _logger.exception({ "model": model_name, "Exception": e })
         return False, model_name
 
 
@@ -113,7 +138,7 @@ def _export_model(mlflow_client, http_client, dbx_client, model_name, output_dir
         model = _model["registered_model"]
         permissions = None
 
-    versions, failed_versions = _export_versions(mlflow_client, model, ori_versions, output_dir, opts)
+    versions, failed_versions = _export_versions(mlflow_client, dbx_client, model, ori_versions, output_dir, opts)
 
     _adjust_model(model, versions)
     if permissions:
@@ -129,51 +154,120 @@ def _export_model(mlflow_client, http_client, dbx_client, model_name, output_dir
         "export_permissions": opts.export_permissions
     }
     _model = { "registered_model": model }
-    io_utils.write_export_file(output_dir, "model.json", __file__, _model, info_attr)
+    _model = io_utils.mk_export_dict(__file__, _model, info_attr)
+    io_utils.write_export_bytes(output_dir, "model.json", _dump_model_json(_model))
     _logger.info(f"Exported {len(versions)}/{len(ori_versions)} '{msg}' versions for model '{model_name}'")
 
 
-def _export_versions(mlflow_client, model_dct, versions, output_dir, opts):
+def _export_versions(mlflow_client, dbx_client, model_dct, versions, output_dir, opts):
     aliases = model_dct.get("aliases", [])
     version_aliases = {}
     [ version_aliases.setdefault(x["version"], []).append(x["alias"]) for x in aliases ] # map of version => its aliases
 
-    output_versions, failed_versions = ([], [])
+    selected_versions = []
     for j,vr in enumerate(versions):
-        if len(opts.stages) > 0 and not vr.current_stage.lower() in opts.stages:
+        if opts.stages and vr.current_stage.lower() not in opts.stages:
             continue
-        if len(opts.versions) > 0 and not vr.version in opts.versions:
+        if opts.versions and vr.version not in opts.versions:
             continue
-        _export_version(mlflow_client, vr, output_dir, version_aliases.get(vr.version,[]), output_versions, failed_versions, j, len(versions), opts)
-    output_versions.sort(key=lambda x: x["version"], reverse=False)
-    return output_versions, failed_versions
+        selected_versions.append((j, vr))
+
+    local_output_dir = _filesystem.mk_local_path(output_dir)
+    os.makedirs(local_output_dir, exist_ok=True)
+    staging_root = _mk_staging_root(local_output_dir)
+    run_versions = {} # map of run ID => its versions since versions can share a run
+    for j,vr in selected_versions:
+        run_versions.setdefault(vr.run_id, []).append((j, vr, version_aliases.get(vr.version,[])))
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=_get_max_workers()) as executor:
+        runs = _get_runs(mlflow_client, run_versions.keys(), executor)
+        experiments_cache = _get_experiments(mlflow_client, { run.info.experiment_id for run in runs.values() }, executor)
+        for run_id, _versions in run_versions.items():
+            future = executor.submit(_export_run_versions,
+                mlflow_client, dbx_client, _versions, runs.get(run_id), experiments_cache,
+                output_dir, os.path.join(local_output_dir, run_id), staging_root, len(versions), opts)
+            futures.append(future)
 
+    output_versions, failed_versions = ([], [])
+    for future in futures:
+        for vr_dct, failed_msg in future.result():
+            if failed_msg:
+                failed_versions.append(failed_msg)
+            else:
+                output_versions.append(vr_dct)
+    output_versions.sort(key=lambda x: int(x["version"]))
+    failed_versions.sort(key=lambda x: int(x["version"]["version"]))
+    return output_versions, failed_versions
 
-def _export_version(mlflow_client, vr, output_dir, aliases, output_versions, failed_versions, j, num_versions, opts):
-    _output_dir = os.path.join(output_dir, vr.run_id)
-    msg = { "name": vr.name, "version": vr.version, "stage": vr.current_stage, "aliases": aliases }
-    _logger.info(f"Exporting model verson {j+1}/{num_versions}: {msg} to '{_output_dir}'")
 
-    vr_dct = model_utils.model_version_to_dict(vr)
-    vr_dct["aliases"] = aliases
+def _export_run_versions(mlflow_client, dbx_client, run_versions, run, experiments_cache, output_dir, run_dir, staging_root, num_versions, opts):
+    """
+    Export the versions of one run. The run is exported only once and shared by its versions.
+    :param run_versions: List of tuples of version index, ModelVersion and its aliases.
+    :param run: Prefetched run of the versions or None if it could not be fetched.
+    :param run_dir: Local directory the run is exported to.
+    :param staging_root: Existing directory in which the run export is staged.
+    :return: List of tuples of exported version dict (or None) and failure message (or None).
+    """
+    run_id = run_versions[0][1].run_id
+    exported_run, run_exception = None, None
+    staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=staging_root)
     try:
-        if opts.export_version_model:
-            _output_dir = os.path.join(output_dir, "version_models", vr.version)
-            vr_dct["_download_uri"] = model_utils.export_version_model(mlflow_client, vr, _output_dir)
-
-        run = export_run(vr.run_id,
-            output_dir = os.path.join(output_dir, vr.run_id),
+        exported_run = export_run(run_id,
+            output_dir = staging_dir,
             export_deleted_runs = opts.export_deleted_runs,
             notebook_formats = opts.notebook_formats,
             mlflow_client = mlflow_client,
-            raise_exception = True
+            raise_exception = True,
+            run = run,
+            dbx_client = dbx_client
         )
-        if not run and not opts.export_deleted_runs:
+        if exported_run:
+            _move_staged_run(staging_dir, run_dir)
+    except RestException as e:
+        run_exception = e
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    return [ _export_version(mlflow_client, vr, run, exported_run, run_exception, experiments_cache, output_dir, run_dir, aliases, j, num_versions, opts)
+        for j, vr, aliases in run_versions ]
+
+
+def _export_version(mlflow_client, vr, run, exported_run, run_exception, experiments_cache, output_dir, run_dir, aliases, j, num_versions, opts):
+    """
+    :param run: Prefetched run of the version or None if it could not be fetched.
+    :param exported_run: Run returned by export_run or None if it was not exported.
+    :param run_exception: RestException raised when exporting the run or None.
+    :param experiments_cache: Experiments of the model's versions as a dict of experiment ID to Experiment.
+    :param run_dir: Local directory the version's run is exported to.
+    :return: Tuple of exported version dict (or None) and failure message (or None).
+    """
+    msg = { "name": vr.name, "version": vr.version, "stage": vr.current_stage, "aliases": aliases }
+    _logger.info(f"Exporting model verson {j+1}/{num_versions}: {msg} to '{run_dir}'")
+
+    vr_dct = _vr_to_dict(vr)
+    vr_dct["aliases"] = aliases
+    try:
+        if run_exception:
+            raise run_exception
+        if opts.export_version_model:
+            model_path = _get_run_model_path(vr, run)
+            if model_path is None:
+                _output_dir = os.path.join(output_dir, "version_models", vr.version)
+                vr_dct["_download_uri"] = model_utils.export_version_model(mlflow_client, vr, _output_dir)
+            else: # version model is already exported with the run's artifacts
+                vr_dct["_download_uri"] = mlflow_client.get_model_version_download_uri(vr.name, vr.version)
+                vr_dct["_download_path"] = os.path.join(vr.run_id, "artifacts", model_path) if model_path \
+                    else os.path.join(vr.run_id, "artifacts")
+                vr_dct["_version_model_copy_avoided"] = True
+
+        if not exported_run and not opts.export_deleted_runs:
             failed_msg = { "message": "deleted run",  "version": vr_dct }
-            failed_versions.append(failed_msg)
+            return None, failed_msg
         else:
-            _add_metadata_to_version(mlflow_client, vr_dct, run)
-            output_versions.append(vr_dct)
+            _add_metadata_to_version(mlflow_client, vr_dct, exported_run, experiments_cache)
+            return vr_dct, None
 
     except RestException as e:
         err_msg = { "model": vr.name, "version": vr.version, "run_id": vr.run_id, "RestException": e.json  }
@@ -182,73 +276,200 @@ def _export_version(mlflow_client, vr, output_dir, aliases, output_versions, fai
             _logger.error(f"Version export failed (1): {err_msg}")
         else:
             err_msg = { **{"message": "Version cannot be exported"}, **err_msg}
-            _logger.error(f"Version export failed (2): {err_msg}")
-            _logger.error(err_msg)
-            import traceback
-            traceback.print_exc()
+            _logger.exception(f"Version export failed (2): {err_msg}")
         failed_msg = { "version": vr_dct, "RestException": e.json  }
-        failed_versions.append(failed_msg)
+        return None, failed_msg
 
 
-def _add_metadata_to_version(mlflow_client, vr_dct, run):
+def _mk_staging_root(local_output_dir):
+    """
+    Create the directory in which versions' runs are exported before being moved into the output directory.
+    It is MLFLOW_EXPORT_STAGING_DIR if set (e.g. a local disk when exporting to a network filesystem),
+    otherwise the output directory itself so the final move is a rename.
+    """
+    staging_root = os.environ.get("MLFLOW_EXPORT_STAGING_DIR") or local_output_dir
+    os.makedirs(staging_root, exist_ok=True)
+    return staging_root
+
+
+def _move_staged_run(staging_dir, run_dir):
+    """
+    Move an exported run into place, replacing the run's export from a previous export into the same output directory.
+    A run is exported only once per model export, so an existing run directory is always stale.
+    """
+    if os.path.exists(run_dir):
+        shutil.rmtree(run_dir)
+    try:
+        os.rename(staging_dir, run_dir)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.copytree(staging_dir, run_dir)
+
+
+def _vr_to_dict(vr):
+    """
+    Convert a ModelVersion to a dictionary by picking its attributes directly rather than with model_utils.model_version_to_dict.
+    Aliases are not picked since the caller sets them from the registered model.
+    """
+    return {
+        "name": vr.name,
+        "version": vr.version,
+        "creation_timestamp": vr.creation_timestamp,
+        "last_updated_timestamp": vr.last_updated_timestamp,
+        "description": vr.description,
+        "user_id": vr.user_id,
+        "current_stage": vr.current_stage,
+        "source": vr.source,
+        "run_id": vr.run_id,
+        "run_link": vr.run_link,
+        "status": vr.status,
+        "status_message": vr.status_message,
+        "tags": dict(vr.tags) if vr.tags else {}
+    }
+
+
+def _get_run_model_path(vr, run):
+    """
+    If the version's model lives under its run's artifact URI, return the model's relative artifact path.
+    :return: Relative path or None if the model is not under the run's artifacts (or the run is unknown).
+    """
+    if run is None:
+        return None
+    source = getattr(vr, "storage_location", None) if model_utils.is_unity_catalog_model(vr.name) else vr.source
+    if not source:
+        return None
+    for prefix in [ run.info.artifact_uri, f"runs:/{run.info.run_id}" ]:
+        if source == prefix:
+            return ""
+        if source.startswith(f"{prefix}/"):
+            return source[len(prefix)+1:]
+    return None
+
+
+def _get_max_workers():
+    """
+    Number of threads used to export a model's versions. Set with the MLFLOW_EXPORT_PARALLELISM environment variable.
+    An invalid value falls back to the default.
+    """
+    value = os.environ.get("MLFLOW_EXPORT_PARALLELISM")
+    if value is None:
+        return _DEFAULT_MAX_WORKERS
+    try:
+        max_workers = int(value)
+    except ValueError:
+        max_workers = 0
+    if max_workers < 1:
+        _logger.warning(f"Invalid MLFLOW_EXPORT_PARALLELISM '{value}'. Using default of {_DEFAULT_MAX_WORKERS} threads.")
+        return _DEFAULT_MAX_WORKERS
+    return max_workers
+
+
+def _get_runs(mlflow_client, run_ids, executor):
+    """
+    Fetch each distinct run of the versions once.
+    Runs that cannot be fetched are left out so that export_run reports the error for its version.
+    :return: Dict of run ID to Run.
+    """
+    def _get_run(run_id):
+        try:
+            return mlflow_client.get_run(run_id)
+        except RestException:
+            return None
+    runs = executor.map(_get_run, run_ids)
+    return { run.info.run_id: run for run in runs if run }
+
+
+def _get_experiments(mlflow_client, experiment_ids, executor):
+    """
+    Fetch each distinct experiment of the versions' runs once.
+    :return: Dict of experiment ID to Experiment.
+    """
+    def _get_experiment(experiment_id):
+        try:
+            return mlflow_client.get_experiment(experiment_id)
+        except RestException:
+            return None
+    experiments = executor.map(_get_experiment, experiment_ids)
+    return { exp.experiment_id: exp for exp in experiments if exp }
+
+
+def _add_metadata_to_version(mlflow_client, vr_dct, run, experiments_cache):
     vr_dct["_run_artifact_uri"] = run.info.artifact_uri
-    experiment = mlflow_client.get_experiment(run.info.experiment_id)
+    exp_id = run.info.experiment_id
+    experiment = experiments_cache.get(exp_id)
+    if experiment is None:
+        experiment = experiments_cache.setdefault(exp_id, mlflow_client.get_experiment(exp_id))
     vr_dct["_experiment_name"] = experiment.name
 
 
 def _adjust_model(model, versions):
     """
     1. Add human friendly timestamps to model and versions
-    2. For aesthetic reasons reorder dict keys
+    2. For aesthetic reasons order dict keys per _MODEL_KEY_ORDER and _MODEL_TRAILING_KEYS
     3. Rename ModelVersion 'latest_versions' (if it exists) to 'versions' key
     """
 
-    def _reorder(model, key):
-        val = model.pop(key, None)
-        if val:
-            model[key] = val
-
-    def _adjust_timestamp(dct, key):
-        dct[f"_{key}"] = fmt_ts_millis(dct.get(key))
-
-    # add human friendly timestamps
-    def _adjust_timestamps(dct):
-        _adjust_timestamp(dct, "creation_timestamp")
-        _adjust_timestamp(dct, "last_updated_timestamp")
-
     # add human friendly timestamps for model
     _adjust_timestamps(model)
 
-    # reorder tags and aliases keys
-    _reorder(model, "tags")
-    _reorder(model, "aliases")
-
     # rename ModelVersion 'latest_versions' (if it exists) to 'versions'
     model["versions"] = versions
     model.pop("latest_versions", None)
 
+    ordered = { k: model[k] for k in _MODEL_KEY_ORDER if k in model }
+    ordered.update((k,v) for k,v in model.items() if k not in ordered and k not in _MODEL_TRAILING_KEYS)
+    ordered.update((k,model[k]) for k in _MODEL_TRAILING_KEYS if model.get(k) or k == "versions") # drop empty tags and aliases
+    model.clear()
+    model.update(ordered)
+
     # add human friendly timestamps for versions
-    for vr in versions:
-        _adjust_timestamps(vr)
+    _adjust_version_timestamps(versions)
+
+
+def _adjust_timestamps(dct):
+    dct["_creation_timestamp"] = fmt_ts_millis(dct.get("creation_timestamp"))
+    dct["_last_updated_timestamp"] = fmt_ts_millis(dct.get("last_updated_timestamp"))
+
+
+def _adjust_version_timestamps(versions):
+    """
+    Vectorized _adjust_timestamps for all versions with one pandas conversion per timestamp key.
+    Formats as fmt_ts_millis does: UTC rounded to seconds, and None for an unset timestamp.
+    """
+    for key in ("creation_timestamp", "last_updated_timestamp"):
+        seconds = pd.Series([ vr.get(key) for vr in versions ], dtype="float64").div(1000).round()
+        fmt_seconds = pd.to_datetime(seconds, unit="s", utc=True).dt.strftime(TS_FORMAT)
+        fmt_seconds = fmt_seconds.where(seconds.fillna(0) != 0, None)
+        for vr, fmt in zip(versions, fmt_seconds):
+            vr[f"_{key}"] = fmt
+
+
+def _dump_model_json(obj):
+    """
+    Serialize model.json with orjson if it is installed since the model can have many versions.
+    """
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, indent=2)+"\n").encode("utf-8")
 
 
 def _normalize_stages(stages):
     """
     Normalize polymorphic 'stages' variable. Fun stuff. ;)
     :param stages: Can be a string stage, string comma-delimited list of stages or None.
-    :return: Returns list of stages as strings.
+    :return: Returns frozenset of lower-cased stages as strings.
     """
-    from mlflow.entities.model_registry import model_version_stages
     if stages is None:
-        return []
+        return frozenset()
     if isinstance(stages, str):
         if stages == "":
-            return []
+            return frozenset()
         stages = stages.split(",")
-    stages = [stage.lower() for stage in stages]
-    for stage in stages:
-        if stage not in model_version_stages._CANONICAL_MAPPING:
-            _logger.warning(f"stage '{stage}' must be one of: {model_version_stages.ALL_STAGES}")
+    stages = frozenset(stage.lower() for stage in stages)
+    bad_stages = [ stage for stage in stages if stage not in _CANONICAL_STAGES ]
+    for stage in bad_stages:
+        _logger.warning(f"stage '{stage}' must be one of: {model_version_stages.ALL_STAGES}")
     return stages
 
 
@@ -271,7 +492,7 @@ def main(model, output_dir,
         notebook_formats
     ):
     _logger.info("Options:")
-    for k,v in locals().items():
+    for k,v in click.get_current_context().params.items():
         _logger.info(f"  {k}: {v}")
     versions = versions.split(",") if versions else []
     export_model(
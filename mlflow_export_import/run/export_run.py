@@ -32,7 +32,10 @@ def export_run(
         export_deleted_runs = False,
         notebook_formats = None,
         raise_exception = False,
-        mlflow_client = None
+        mlflow_client = None,
+        run = None,
+        dbx_client = None,
+        export_artifacts = True
     ):
     """
     :param run_id: Run ID.
@@ -41,43 +44,36 @@ def export_run(
     :param notebook_formats: List of notebook formats to export. Values are SOURCE, HTML, JUPYTER or DBC.
     :param raise_exception: Raise an exception instead of just logging error and returning None.
     :param mlflow_client: MLflow client.
+    :param run: Run of 'run_id' if already fetched by the caller. Saves a call to get_run.
+    :param dbx_client: Databricks HTTP client. If not set, one is created from the MLflow client.
+    :param export_artifacts: Export the run's artifacts. Notebooks are exported regardless.
     :return: Run or None if the run was not exported due to export_deleted_runs or errors.
     """
 
     mlflow_client = mlflow_client or mlflow.MlflowClient()
-    dbx_client = create_dbx_client(mlflow_client)
+    dbx_client = dbx_client or create_dbx_client(mlflow_client)
 
     if notebook_formats is None:
         notebook_formats = []
 
     experiment_id = None
     try:
-        run = mlflow_client.get_run(run_id)
+        if run is None:
+            run = mlflow_client.get_run(run_id)
         if run.info.lifecycle_stage == "deleted" and not export_deleted_runs:
             _logger.warning(f"Not exporting run '{run.info.run_id} because its lifecycle_stage is '{run.info.lifecycle_stage}'")
             return None
         experiment_id = run.info.experiment_id
         msg = { "run_id": run.info.run_id, "lifecycle_stage": run.info.lifecycle_stage, "experiment_id": run.info.experiment_id }
         _logger.info(f"Exporting run: {msg}")
-        tags = run.data.tags
-        tags = dict(sorted(tags.items()))
-
-        info = utils.strip_underscores(run.info)
-        info["_start_time"] = fmt_ts_millis(run.info.start_time)
-        info["_end_time"] = fmt_ts_millis(run.info.end_time)
-        mlflow_attr = {
-            "info": info,
-            "params": run.data.params,
-            "metrics": _get_metrics_with_steps(mlflow_client, run),
-            "tags": tags,
-            "inputs": _inputs_to_dict(run.inputs)
-        }
+        mlflow_attr = mk_run_attr(mlflow_client, run)
+        tags = mlflow_attr["tags"]
         io_utils.write_export_file(output_dir, "run.json", __file__, mlflow_attr)
         fs = _filesystem.get_filesystem(".")
 
         # copy artifacts
         dst_path = os.path.join(output_dir, "artifacts")
-        artifacts = mlflow_client.list_artifacts(run.info.run_id)
+        artifacts = mlflow_client.list_artifacts(run.info.run_id) if export_artifacts else []
         if len(artifacts) > 0: # Because of https://github.com/mlflow/mlflow/issues/2839
             fs.mkdirs(dst_path)
             mlflow.artifacts.download_artifacts(
@@ -109,6 +105,22 @@ def export_run(
         return None
 
 
+def mk_run_attr(mlflow_client, run):
+    """
+    Create the 'mlflow' stanza of run.json: run info, params, metrics with their steps, tags and inputs.
+    """
+    info = utils.strip_underscores(run.info)
+    info["_start_time"] = fmt_ts_millis(run.info.start_time)
+    info["_end_time"] = fmt_ts_millis(run.info.end_time)
+    return {
+        "info": info,
+        "params": run.data.params,
+        "metrics": _get_metrics_with_steps(mlflow_client, run),
+        "tags": dict(sorted(run.data.tags.items())),
+        "inputs": _inputs_to_dict(run.inputs)
+    }
+
+
 def _get_metrics_with_steps(mlflow_client, run):
     metrics_with_steps = {}
     for metric in run.data.metrics.keys():
@@ -35,7 +35,8 @@ def import_run(
         dst_notebook_dir = None,
         use_src_user_id = False,
         mlmodel_fix = True,
-        mlflow_client = None
+        mlflow_client = None,
+        terminate = True
     ):
     """
     Imports a run into the specified experiment.
@@ -50,6 +51,8 @@ def import_run(
                             Databricks since setting it is not allowed.
     :param dst_notebook_dir: Databricks destination workspace directory for notebook import.
     :param mlflow_client: MLflow client.
+    :param terminate: Set the run's status to FINISHED and delete it if the source run is deleted.
+                      If False, the caller is responsible for doing so, e.g. after logging more artifacts.
     :return: The run and its parent run ID if the run is a nested run.
     """
 
@@ -90,11 +93,11 @@ def import_run(
             mlflow_client.log_artifacts(run_id, mk_local_path(path))
         if mlmodel_fix:
             run_utils.update_mlmodel_run_id(mlflow_client, run_id)
-        mlflow_client.set_terminated(run_id, RunStatus.to_string(RunStatus.FINISHED))
+        if terminate:
+            mlflow_client.set_terminated(run_id, RunStatus.to_string(RunStatus.FINISHED))
+            if src_run_dct["info"]["lifecycle_stage"] == LifecycleStage.DELETED:
+                mlflow_client.delete_run(run_id)
         run = mlflow_client.get_run(run_id)
-        if src_run_dct["info"]["lifecycle_stage"] == LifecycleStage.DELETED:
-            mlflow_client.delete_run(run.info.run_id)
-            run = mlflow_client.get_run(run.info.run_id)
     except Exception as e:
         mlflow_client.set_terminated(run_id, RunStatus.to_string(RunStatus.FAILED))
         import traceback
@@ -1,8 +1,14 @@
+import os
+import time
+import pytest
+import mlflow
 from tests.open_source.oss_utils_test import create_simple_run
 from tests.compare_utils import compare_runs
 from tests.open_source.init_tests import mlflow_context
 
 from mlflow_export_import.copy import copy_run
+from mlflow_export_import.common import io_utils
+from mlflow_export_import.common import MlflowExportImportException
 from tests.open_source.oss_utils_test import mk_test_object_name_default
 
 
@@ -32,6 +38,106 @@ def test_run_basic_with_dst_mlflow_uri(mlflow_context):
     compare_runs(mlflow_context, run1, run2)
 
 
+# == Test for pipelined artifact download and upload
+
+def test_run_pipelined_artifacts(mlflow_context):
+    _, src_run = create_simple_run(mlflow_context.client_src)
+    dst_run = copy_run._copy(src_run.info.run_id, mk_test_object_name_default(), mlflow_context.client_src, mlflow_context.client_dst)
+    _check_pipelined_artifacts(mlflow_context.client_dst, dst_run)
+    assert dst_run.info.status == "FINISHED"
+    assert dst_run.info.lifecycle_stage == "active"
+
+
+def test_run_pipelined_artifacts_deleted_run(mlflow_context):
+    _, src_run = create_simple_run(mlflow_context.client_src)
+    mlflow_context.client_src.delete_run(src_run.info.run_id)
+    dst_run = copy_run._copy(src_run.info.run_id, mk_test_object_name_default(), mlflow_context.client_src, mlflow_context.client_dst)
+    _check_pipelined_artifacts(mlflow_context.client_dst, dst_run)
+    assert dst_run.info.status == "FINISHED"
+    assert dst_run.info.lifecycle_stage == "deleted"
+
+
+def test_run_pipelined_import_failure(mlflow_context, monkeypatch):
+    _, src_run = create_simple_run(mlflow_context.client_src)
+    downloaded = []
+    def _download_artifact(client, artifact_uri, dst_dir):
+        time.sleep(1)
+        downloaded.append(artifact_uri)
+    def _import_run(*args, **kwargs):
+        raise MlflowExportImportException("Import failed")
+    monkeypatch.setattr(copy_run, "_download_artifact", _download_artifact)
+    monkeypatch.setattr(copy_run, "import_run", _import_run)
+
+    with pytest.raises(MlflowExportImportException):
+        copy_run._copy(src_run.info.run_id, mk_test_object_name_default(), mlflow_context.client_src, mlflow_context.client_dst)
+    assert len(downloaded) <= 1 # pending downloads of the three top-level artifacts are cancelled
+
+
+def _check_pipelined_artifacts(client, run):
+    run_id = run.info.run_id
+    artifacts = { art.path: art.is_dir for art in client.list_artifacts(run_id) }
+    assert artifacts == { "dir2": True, "info.txt": False, "model": True }
+    assert [ art.path for art in client.list_artifacts(run_id, "dir2") ] == [ "dir2/info.txt" ]
+    mlmodel = io_utils.read_file(client.download_artifacts(run_id, "model/MLmodel"), "yaml")
+    assert mlmodel["run_id"] == run_id
+
+
+# == Test for local file stores on the same device
+
+def test_run_local_file_stores(tmp_path):
+    src_client = mlflow.MlflowClient(f"file://{tmp_path}/mlruns_src")
+    dst_client = mlflow.MlflowClient(f"file://{tmp_path}/mlruns_dst")
+    exp_id = src_client.create_experiment(mk_test_object_name_default())
+    run_id = src_client.create_run(exp_id).info.run_id
+    src_client.log_param(run_id, "max_depth", "4")
+    src_client.log_metric(run_id, "rmse", 0.789)
+    src_client.set_tag(run_id, "my_tag", "my_val")
+    info_path = os.path.join(tmp_path, "info.txt")
+    with open(info_path, "w", encoding="utf-8") as f:
+        f.write("Hi artifact")
+    src_client.log_artifact(run_id, info_path)
+    mlmodel_path = os.path.join(tmp_path, "MLmodel")
+    with open(mlmodel_path, "w", encoding="utf-8") as f:
+        f.write(f"run_id: {run_id}\n")
+    src_client.log_artifact(run_id, mlmodel_path, "model")
+    src_client.set_terminated(run_id)
+    src_run = src_client.get_run(run_id)
+
+    dst_run = copy_run._copy(run_id, mk_test_object_name_default(), src_client, dst_client)
+
+    assert dst_run.data.params == src_run.data.params
+    assert dst_run.data.metrics == src_run.data.metrics
+    assert dst_run.data.tags["my_tag"] == "my_val"
+
+    src_dir = src_run.info.artifact_uri.replace("file://","")
+    dst_dir = dst_run.info.artifact_uri.replace("file://","")
+    assert os.stat(os.path.join(src_dir, "info.txt")).st_ino == os.stat(os.path.join(dst_dir, "info.txt")).st_ino
+    assert io_utils.read_file(os.path.join(src_dir, "model", "MLmodel"), "yaml")["run_id"] == run_id
+    assert io_utils.read_file(os.path.join(dst_dir, "model", "MLmodel"), "yaml")["run_id"] == dst_run.info.run_id
+
+
+def test_run_local_file_stores_non_local_dst_artifacts(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src_client = mlflow.MlflowClient(f"file://{tmp_path}/mlruns_src")
+    dst_client = mlflow.MlflowClient(f"file://{tmp_path}/mlruns_dst")
+    exp_id = src_client.create_experiment(mk_test_object_name_default())
+    run_id = src_client.create_run(exp_id).info.run_id
+    info_path = os.path.join(tmp_path, "info.txt")
+    with open(info_path, "w", encoding="utf-8") as f:
+        f.write("Hi artifact")
+    src_client.log_artifact(run_id, info_path)
+    src_client.set_terminated(run_id)
+    dst_exp_name = mk_test_object_name_default()
+    dst_exp_id = dst_client.create_experiment(dst_exp_name, artifact_location="s3://some-bucket/prefix")
+
+    # The artifacts cannot be linked into S3, so the copy must take the export/import path
+    # (which fails here) rather than linking them into a local './s3:' directory
+    with pytest.raises(Exception):
+        copy_run._copy(run_id, dst_exp_name, src_client, dst_client)
+    assert not os.path.exists(os.path.join(tmp_path, "s3:"))
+    assert "FINISHED" not in [ run.info.status for run in dst_client.search_runs([dst_exp_id]) ]
+
+
 # == Test for source and exported model prediction equivalence
 
 from tests.sklearn_utils import X_test
@@ -56,3 +162,15 @@ def test_model_predictions(mlflow_context):
     predictions1 = model1.predict(X_test)
     predictions2 = model2.predict(X_test)
     assert np.array_equal(predictions1, predictions2)
+
+
+# == Test for client caching
+
+from mlflow_export_import.copy import copy_utils
+
+
+def test_mk_client_cached_only_with_tracking_uri(tmp_path):
+    tracking_uri = f"file://{tmp_path}/mlruns"
+    assert copy_utils.mk_client(tracking_uri) is copy_utils.mk_client(tracking_uri)
+    registry_uri = f"file://{tmp_path}/registry"
+    assert copy_utils.mk_client(None, registry_uri) is not copy_utils.mk_client(None, registry_uri)
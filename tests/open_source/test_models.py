@@ -1,6 +1,7 @@
 import os
 from mlflow_export_import.common.source_tags import ExportTags
 from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.common import io_utils
 from mlflow_export_import.model.export_model import export_model
 from mlflow_export_import.model.import_model import import_model
 from mlflow_export_import.model.import_model import _extract_model_path, _path_join
@@ -129,6 +130,83 @@ def test_export_delete_No_delete_run_Yes(mlflow_context):
     assert run_lifecycle_stages == ["active"]
 
 
+# == Test export version model
+
+def test_export_version_model_copy_avoided(mlflow_context):
+    model_name_src = mk_test_object_name_default()
+    mlflow_context.client_src.create_registered_model(model_name_src)
+    vr, run = create_version(mlflow_context.client_src, model_name_src, "Production")
+
+    export_model(
+        model_name = model_name_src,
+        output_dir = mlflow_context.output_dir,
+        export_version_model = True,
+        mlflow_client = mlflow_context.client_src
+    )
+    model = io_utils.read_file_mlflow(os.path.join(mlflow_context.output_dir, "model.json"))
+    vr_dct = model["registered_model"]["versions"][0]
+    assert vr_dct["_version_model_copy_avoided"]
+    assert vr_dct["_download_uri"] == mlflow_context.client_src.get_model_version_download_uri(model_name_src, vr.version)
+    assert vr_dct["_download_path"] == os.path.join(run.info.run_id, "artifacts", "model")
+    assert os.path.exists(os.path.join(mlflow_context.output_dir, vr_dct["_download_path"], "MLmodel"))
+    assert not os.path.exists(os.path.join(mlflow_context.output_dir, "version_models"))
+
+
+# == Test versions sharing a run
+
+def test_export_versions_same_run(mlflow_context):
+    model_name_src = mk_test_object_name_default()
+    mlflow_context.client_src.create_registered_model(model_name_src)
+    vr, run = create_version(mlflow_context.client_src, model_name_src)
+    mlflow_context.client_src.create_model_version(model_name_src, vr.source, run.info.run_id)
+
+    export_model(
+        model_name = model_name_src,
+        output_dir = mlflow_context.output_dir,
+        mlflow_client = mlflow_context.client_src
+    )
+    model = io_utils.read_file_mlflow(os.path.join(mlflow_context.output_dir, "model.json"))
+    versions = model["registered_model"]["versions"]
+    assert [ vr["version"] for vr in versions ] == [ "1", "2" ]
+    assert [ vr["run_id"] for vr in versions ] == [ run.info.run_id, run.info.run_id ]
+    assert os.path.exists(os.path.join(mlflow_context.output_dir, run.info.run_id, "run.json"))
+
+
+# == Test staged version export
+
+def test_export_version_staging_dir(mlflow_context, tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_EXPORT_STAGING_DIR", str(tmp_path))
+    model_name_src = mk_test_object_name_default()
+    mlflow_context.client_src.create_registered_model(model_name_src)
+    _, run = create_version(mlflow_context.client_src, model_name_src, "Production")
+
+    export_model(
+        model_name = model_name_src,
+        output_dir = mlflow_context.output_dir,
+        mlflow_client = mlflow_context.client_src
+    )
+    assert os.path.exists(os.path.join(mlflow_context.output_dir, run.info.run_id, "run.json"))
+    assert os.listdir(tmp_path) == []
+
+
+def test_export_model_again(mlflow_context):
+    model_name_src = mk_test_object_name_default()
+    mlflow_context.client_src.create_registered_model(model_name_src)
+    _, run = create_version(mlflow_context.client_src, model_name_src)
+
+    def _export():
+        export_model(
+            model_name = model_name_src,
+            output_dir = mlflow_context.output_dir,
+            mlflow_client = mlflow_context.client_src
+        )
+        return io_utils.read_file_mlflow(os.path.join(mlflow_context.output_dir, run.info.run_id, "run.json"))
+
+    assert "new_tag" not in _export()["tags"]
+    mlflow_context.client_src.set_tag(run.info.run_id, "new_tag", "new_val")
+    assert _export()["tags"]["new_tag"] == "new_val"
+
+
 # == Internal
 
 def _run_test_export_import_model_stages(mlflow_context, stages=None, versions=None):